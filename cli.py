@@ -11,23 +11,37 @@ from config.logging import setup_logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+def _get_or_create(ctx, key, factory):
+    """Construct a manager on first use and cache it on the context"""
+    if key not in ctx.obj:
+        ctx.obj[key] = factory()
+    return ctx.obj[key]
+
+def _data_manager(ctx) -> DicomDataManager:
+    return _get_or_create(ctx, 'data_manager', lambda: DicomDataManager(ctx.obj['base_dir']))
+
+def _album_manager(ctx) -> AlbumManager:
+    return _get_or_create(ctx, 'album_manager', lambda: AlbumManager(ctx.obj['base_dir']))
+
+def _query(ctx) -> DicomQuery:
+    return _get_or_create(ctx, 'query', lambda: DicomQuery(_data_manager(ctx)))
+
 @click.group()
 @click.option('--base-dir', default='./DICOM', help='Base directory for DICOM files')
 @click.pass_context
 def cli(ctx, base_dir):
     """DICOM Album Management CLI"""
     ctx.ensure_object(dict)
+    # Managers are built lazily so e.g. album commands never pay for a
+    # data-manager construction (and vice versa)
     ctx.obj['base_dir'] = base_dir
-    ctx.obj['data_manager'] = DicomDataManager(base_dir)
-    ctx.obj['album_manager'] = AlbumManager(base_dir)
-    ctx.obj['query'] = DicomQuery(ctx.obj['data_manager'])
 
 @cli.command()
 @click.pass_context
 @click.argument('directory')
 def scan(ctx, directory):
     """Scan a directory for DICOM files"""
-    count = ctx.obj['data_manager'].scan_directory(directory)
+    count = _data_manager(ctx).scan_directory(directory)
     click.echo(f"Processed {count} DICOM files")
 
 @cli.command()
@@ -36,7 +50,7 @@ def scan(ctx, directory):
 @click.option('--description', help='Album description')
 def create_album(ctx, name, description):
     """Create a new album"""
-    album = ctx.obj['album_manager'].create_album(name, description)
+    album = _album_manager(ctx).create_album(name, description)
     click.echo(f"Created album '{name}' with ID: {album.album_id}")
 
 @cli.command()
@@ -45,7 +59,7 @@ def create_album(ctx, name, description):
 @click.argument('image_paths', nargs=-1)
 def add_images(ctx, album_id, image_paths):
     """Add images to an album"""
-    success = ctx.obj['album_manager'].add_images_to_album(album_id, image_paths)
+    success = _album_manager(ctx).add_images_to_album(album_id, image_paths)
     if success:
         click.echo(f"Added {len(image_paths)} images to album {album_id}")
     else:
@@ -55,7 +69,7 @@ def add_images(ctx, album_id, image_paths):
 @click.pass_context
 def list_albums(ctx):
     """List all albums"""
-    albums = ctx.obj['album_manager'].list_albums()
+    albums = _album_manager(ctx).list_albums()
     for album in albums:
         click.echo(f"\nAlbum: {album.name} ({album.album_id})")
         click.echo(f"Description: {album.description}")
@@ -73,7 +87,7 @@ def query():
 @click.option('--patient-name', help='Patient name to search for')
 def by_patient(ctx, patient_id, patient_name):
     """Query by patient information"""
-    results = ctx.obj['query'].query_by_metadata(patient_id, patient_name)
+    results = _query(ctx).query_by_metadata(patient_id, patient_name)
     for patient in results:
         click.echo(f"\nPatient ID: {patient.patient_id}")
         click.echo(f"Patient Name: {patient.patient_name}")
@@ -86,10 +100,10 @@ def by_patient(ctx, patient_id, patient_name):
 @click.option('--description', help='Study description')
 def by_study(ctx, date_from, date_to, description):
     """Query by study information"""
-    date_from = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
-    date_to = datetime.strptime(date_to, '%Y-%m-%d') if date_to else None
+    date_from = datetime.fromisoformat(date_from) if date_from else None
+    date_to = datetime.fromisoformat(date_to) if date_to else None
     
-    results = ctx.obj['query'].query_by_study(date_from, date_to, description)
+    results = _query(ctx).query_by_study(date_from, date_to, description)
     for study in results:
         click.echo(f"\nStudy UID: {study.study_instance_uid}")
         click.echo(f"Description: {study.study_description}")
@@ -103,7 +117,7 @@ def by_study(ctx, date_from, date_to, description):
 @click.option('--description', help='Series description')
 def by_series(ctx, modality, series_number, description):
     """Query by series information"""
-    results = ctx.obj['query'].query_by_series(modality, series_number, description)
+    results = _query(ctx).query_by_series(modality, series_number, description)
     for series in results:
         click.echo(f"\nSeries UID: {series.series_instance_uid}")
         click.echo(f"Modality: {series.modality}")
@@ -128,8 +142,8 @@ def create_from_query(ctx, album_name, query_type, patient_id, modality, study_d
     elif query_type == 'study' and study_description:
         query_params['description'] = study_description
     
-    album_id = ctx.obj['query'].create_album_from_query(
-        ctx.obj['album_manager'],
+    album_id = _query(ctx).create_album_from_query(
+        _album_manager(ctx),
         album_name,
         query_type,
         query_params
@@ -1,14 +1,49 @@
+from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
-import json
+import orjson
 import os
 import logging
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+def _uuid4_batch(count: int) -> List[str]:
+    """Generate count random UUIDs from a single urandom read.
+
+    Each uuid4() call reads from the CSPRNG separately; slicing one
+    os.urandom buffer is much cheaper when creating albums in bulk.
+    """
+    raw = os.urandom(16 * count)
+    return [str(UUID(bytes=raw[i * 16:(i + 1) * 16], version=4)) for i in range(count)]
+
+def _existing_paths(paths: List[str]) -> Set[str]:
+    """Return the subset of paths that exist on disk.
+
+    Paths are grouped by parent directory so a batch from one directory
+    costs a single scandir instead of one stat per file; single-file
+    groups keep the plain os.path.exists check.
+    """
+    by_dir = defaultdict(list)
+    for path in paths:
+        by_dir[os.path.dirname(path)].append(path)
+
+    existing = set()
+    for dir_, group in by_dir.items():
+        if len(group) == 1:
+            if os.path.exists(group[0]):
+                existing.add(group[0])
+            continue
+        try:
+            with os.scandir(dir_ or '.') as it:
+                names = {entry.name for entry in it if entry.is_file()}
+        except OSError:
+            continue
+        existing.update(p for p in group if os.path.basename(p) in names)
+    return existing
+
+@dataclass(slots=True)
 class DicomAlbum:
     album_id: str
     name: str
@@ -19,60 +54,132 @@ class DicomAlbum:
     images: List[str] = field(default_factory=list)  # List of DICOM file paths
     metadata: Dict[str, any] = field(default_factory=dict)
     sharing_url: Optional[str] = None
-    
+    # Side-index for O(1) membership checks; never serialized
+    images_set: Set[str] = field(default_factory=set, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.images_set = set(self.images)
+
+
 class AlbumManager:
+    INDEX_FILENAME = "albums.index.json"
+
     def __init__(self, base_directory: str):
         self.base_directory = base_directory
         self.albums_directory = os.path.join(base_directory, "albums")
+        self.index_path = os.path.join(self.albums_directory, self.INDEX_FILENAME)
         self.albums: Dict[str, DicomAlbum] = {}
         self._ensure_directory_exists()
-        self._load_existing_albums()
-        
+        if os.path.exists(self.index_path):
+            self._load_album_index()
+        else:
+            # Migration path: fall back to the per-album files and build the index
+            self._load_existing_albums()
+            if self.albums:
+                self._write_index()
+
     def _ensure_directory_exists(self):
         """Create albums directory if it doesn't exist"""
         os.makedirs(self.albums_directory, exist_ok=True)
         logger.info(f"Albums directory ensured at: {self.albums_directory}")
         
+    def _album_from_dict(self, data: Dict) -> DicomAlbum:
+        """Build a DicomAlbum from its serialized dict form"""
+        return DicomAlbum(
+            album_id=data['album_id'],
+            name=data['name'],
+            description=data.get('description'),
+            created_at=datetime.fromisoformat(data['created_at']),
+            modified_at=datetime.fromisoformat(data['modified_at']),
+            creator=data.get('creator', 'system'),
+            images=data.get('images', []),
+            metadata=data.get('metadata', {}),
+            sharing_url=data.get('sharing_url')
+        )
+
+    def _load_album_index(self):
+        """Load all albums from the consolidated index file in one parse"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                index_data = orjson.loads(f.read())
+            for data in index_data.values():
+                album = self._album_from_dict(data)
+                self.albums[album.album_id] = album
+            logger.info(f"Loaded {len(self.albums)} albums from index")
+        except Exception as e:
+            logger.error(f"Error loading album index, falling back to per-album files: {e}")
+            self._load_existing_albums()
+
     def _load_existing_albums(self):
-        """Load existing albums from disk"""
+        """Load existing albums from their individual files on disk"""
         if not os.path.exists(self.albums_directory):
             return
-            
+
         for filename in os.listdir(self.albums_directory):
-            if filename.endswith('.json'):
+            if filename.endswith('.json') and filename != self.INDEX_FILENAME:
                 try:
-                    with open(os.path.join(self.albums_directory, filename), 'r') as f:
-                        data = json.load(f)
-                        album = DicomAlbum(
-                            album_id=data['album_id'],
-                            name=data['name'],
-                            description=data.get('description'),
-                            created_at=datetime.fromisoformat(data['created_at']),
-                            modified_at=datetime.fromisoformat(data['modified_at']),
-                            creator=data.get('creator', 'system'),
-                            images=data.get('images', []),
-                            metadata=data.get('metadata', {}),
-                            sharing_url=data.get('sharing_url')
-                        )
+                    with open(os.path.join(self.albums_directory, filename), 'rb') as f:
+                        data = orjson.loads(f.read())
+                        album = self._album_from_dict(data)
                         self.albums[album.album_id] = album
                         logger.info(f"Loaded album: {album.name} ({album.album_id})")
                 except Exception as e:
                     logger.error(f"Error loading album {filename}: {e}")
+
+    def _write_index(self):
+        """Atomically rewrite the consolidated index file"""
+        data = orjson.dumps(
+            {album_id: self._album_to_dict(album) for album_id, album in self.albums.items()}
+        )
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.index_path)
+        logger.debug(f"Rewrote album index: {self.index_path}")
     
-    def create_album(self, name: str, description: Optional[str] = None, 
-                    creator: str = "system") -> DicomAlbum:
+    def create_album(self, name: str, description: Optional[str] = None,
+                    creator: str = "system",
+                    now: Optional[datetime] = None) -> DicomAlbum:
         """Create a new album"""
+        now = now or datetime.now()
         album_id = str(uuid4())
         album = DicomAlbum(
             album_id=album_id,
             name=name,
             description=description,
+            created_at=now,
+            modified_at=now,
             creator=creator
         )
         self.albums[album_id] = album
         self._save_album(album)
         logger.info(f"Created new album: {name} ({album_id})")
         return album
+
+    def create_albums(self, specs: List[Tuple[str, Optional[str]]],
+                      creator: str = "system") -> List[DicomAlbum]:
+        """Create several albums sharing one timestamp and one ID batch"""
+        if not specs:
+            return []
+
+        now = datetime.now()
+        album_ids = _uuid4_batch(len(specs))
+        created = []
+        for album_id, (name, description) in zip(album_ids, specs):
+            album = DicomAlbum(
+                album_id=album_id,
+                name=name,
+                description=description,
+                created_at=now,
+                modified_at=now,
+                creator=creator
+            )
+            self.albums[album_id] = album
+            created.append(album)
+
+        self._save_albums(created)
+        logger.info(f"Created {len(created)} new albums")
+        return created
     
     def add_images_to_album(self, album_id: str, image_paths: List[str]) -> bool:
         """Add images to an existing album"""
@@ -80,15 +187,47 @@ class AlbumManager:
             logger.error(f"Album {album_id} not found")
             return False
             
+        if not image_paths:
+            return True
+
         album = self.albums[album_id]
+        existing = _existing_paths(image_paths)
         for path in image_paths:
-            if path not in album.images and os.path.exists(path):
+            if path in existing and path not in album.images_set:
                 album.images.append(path)
-                
+                album.images_set.add(path)
+
         album.modified_at = datetime.now()
         self._save_album(album)
         logger.info(f"Added {len(image_paths)} images to album {album_id}")
         return True
+
+    def add_images_to_album_bulk(self, album_images: Dict[str, List[str]]) -> bool:
+        """Add images to several albums, writing each album file exactly once"""
+        touched = []
+        all_found = True
+        now = datetime.now()
+        for album_id, image_paths in album_images.items():
+            if album_id not in self.albums:
+                logger.error(f"Album {album_id} not found")
+                all_found = False
+                continue
+            if not image_paths:
+                continue
+
+            album = self.albums[album_id]
+            existing = _existing_paths(image_paths)
+            for path in image_paths:
+                if path in existing and path not in album.images_set:
+                    album.images.append(path)
+                    album.images_set.add(path)
+            album.modified_at = now
+            touched.append(album)
+
+        if touched:
+            self._save_albums(touched)
+            logger.info(f"Added images to {len(touched)} albums")
+        return all_found
     
     def remove_images_from_album(self, album_id: str, image_paths: List[str]) -> bool:
         """Remove images from an album"""
@@ -97,33 +236,55 @@ class AlbumManager:
             return False
             
         album = self.albums[album_id]
-        for path in image_paths:
-            if path in album.images:
-                album.images.remove(path)
-                
+        to_remove = album.images_set.intersection(image_paths)
+        if to_remove:
+            # Rebuild the list once rather than list.remove per path
+            album.images = [p for p in album.images if p not in to_remove]
+            album.images_set -= to_remove
+
         album.modified_at = datetime.now()
         self._save_album(album)
         logger.info(f"Removed {len(image_paths)} images from album {album_id}")
         return True
     
-    def _save_album(self, album: DicomAlbum):
-        """Save album to disk"""
-        album_data = {
+    @staticmethod
+    def _album_to_dict(album: DicomAlbum) -> Dict:
+        """Persistent fields of an album; datetimes are left for orjson"""
+        return {
             'album_id': album.album_id,
             'name': album.name,
             'description': album.description,
-            'created_at': album.created_at.isoformat(),
-            'modified_at': album.modified_at.isoformat(),
+            'created_at': album.created_at,
+            'modified_at': album.modified_at,
             'creator': album.creator,
             'images': album.images,
             'metadata': album.metadata,
             'sharing_url': album.sharing_url
         }
-        
+
+    def _write_album_file(self, album: DicomAlbum):
+        """Atomically write one album's backup JSON file"""
         filepath = os.path.join(self.albums_directory, f"{album.album_id}.json")
-        with open(filepath, 'w') as f:
-            json.dump(album_data, f, indent=2)
-        logger.debug(f"Saved album to disk: {filepath}")
+        data = orjson.dumps(
+            self._album_to_dict(album),
+            option=orjson.OPT_INDENT_2
+        )
+        tmp_path = filepath + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+        logger.debug("Saved album to disk: %s", filepath)
+
+    def _save_album(self, album: DicomAlbum):
+        """Save album to disk"""
+        self._write_album_file(album)
+        self._write_index()
+
+    def _save_albums(self, albums):
+        """Save several albums with a single index rewrite"""
+        for album in albums:
+            self._write_album_file(album)
+        self._write_index()
     
     def delete_album(self, album_id: str) -> bool:
         """Delete an album"""
@@ -134,8 +295,9 @@ class AlbumManager:
         filepath = os.path.join(self.albums_directory, f"{album_id}.json")
         if os.path.exists(filepath):
             os.remove(filepath)
-            
+
         del self.albums[album_id]
+        self._write_index()
         logger.info(f"Deleted album {album_id}")
         return True
     
@@ -1,122 +1,469 @@
+from bisect import insort
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from operator import attrgetter
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 import pydicom
+from pydicom.misc import is_dicom
+from pydicom.tag import Tag
 import os
+import pickle
+import sys
 import logging
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# The only tags the hierarchy needs; restricting the read to these keeps
+# pydicom from parsing the rest of the dataset. Resolved to Tag objects
+# once instead of keyword lookups on every dcmread call.
+_TAG_LIST = [
+    Tag(0x0010, 0x0020),  # PatientID
+    Tag(0x0010, 0x0010),  # PatientName
+    Tag(0x0020, 0x000D),  # StudyInstanceUID
+    Tag(0x0020, 0x000E),  # SeriesInstanceUID
+    Tag(0x0008, 0x0020),  # StudyDate
+    Tag(0x0008, 0x1030),  # StudyDescription
+    Tag(0x0008, 0x103E),  # SeriesDescription
+    Tag(0x0008, 0x0060),  # Modality
+    Tag(0x0020, 0x0011),  # SeriesNumber
+]
+
+def _iter_dicom_paths(root: str):
+    """Yield candidate DICOM file paths beneath root using os.scandir.
+
+    scandir reuses the directory entry's type information, avoiding the
+    per-entry stat that os.walk pays.
+    """
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    name = entry.name
+                    # Hidden entries are OS/config noise (.DS_Store, .git, ...)
+                    if name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        # A DICOMDIR has a valid DICM preamble but is a
+                        # Media Storage Directory, not an instance; parsing
+                        # it as one would ingest a phantom patient
+                        if name == 'DICOMDIR':
+                            continue
+                        if name.startswith('I') or name.endswith(('.dcm', '.DCM', '.ima')):
+                            yield entry.path
+                        elif _is_dicom_file(entry.path):
+                            # 132-byte preamble check, far cheaper than a
+                            # failed dcmread on a non-DICOM file
+                            yield entry.path
+        except OSError as e:
+            logger.warning(f"Could not scan directory: {e}")
+
+def _is_dicom_file(path: str) -> bool:
+    """Preamble check that treats unreadable/short files as non-DICOM"""
+    try:
+        return is_dicom(path)
+    except OSError:
+        return False
+
+def _intern(value: str) -> str:
+    """sys.intern that tolerates str subclasses like pydicom's UID"""
+    if type(value) is not str:
+        value = str(value)
+    return sys.intern(value)
+
+def _parse_dicom_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a DICOM DA value (YYYYMMDD) without the strptime machinery"""
+    try:
+        return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+    except (ValueError, TypeError):
+        return None
+
+_READ_BUFFER_SIZE = 65536
+
+def _get_str(ds, keyword: str, default: str = '') -> str:
+    """Fetch a tag value as str without re-boxing values that already are.
+
+    Dataset.get by keyword skips the attribute-lookup path through
+    Dataset.__getattr__, and most values (UIDs, codes) are str subclasses
+    that need no str() call; PersonName and numbers still get converted.
+    """
+    value = ds.get(keyword, default)
+    if value is None:
+        return default
+    return value if isinstance(value, str) else str(value)
+
+def _extract_tags(file_path: str) -> Optional[Tuple]:
+    """Read the header tags needed for the hierarchy from a single file.
+
+    Module-level so it can run in worker processes; returns a plain tuple
+    that is cheap to pickle back to the main process, or None on failure.
+    """
+    try:
+        # A 64 KB buffer swallows pydicom's many small header reads in one
+        # syscall (the whole header region usually fits), and the fadvise
+        # hint lets the kernel prefetch it before pydicom asks
+        with open(file_path, 'rb', buffering=_READ_BUFFER_SIZE) as f:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, _READ_BUFFER_SIZE, os.POSIX_FADV_WILLNEED)
+            ds = pydicom.dcmread(f, stop_before_pixels=True, specific_tags=_TAG_LIST)
+        series_number = ds.get('SeriesNumber')
+        return (
+            _get_str(ds, 'PatientID', 'unknown'),
+            _get_str(ds, 'PatientName'),
+            _get_str(ds, 'StudyInstanceUID') or 'study_1',
+            ds.get('StudyDate'),
+            _get_str(ds, 'StudyDescription'),
+            _get_str(ds, 'SeriesInstanceUID') or 'series_1',
+            _get_str(ds, 'SeriesDescription'),
+            _get_str(ds, 'Modality'),
+            int(series_number) if series_number is not None else None,
+            file_path
+        )
+    except Exception as e:
+        logger.error(f"Error processing {file_path}: {e}", exc_info=True)
+        return None
+
+@dataclass(slots=True)
 class DicomImage:
     file_path: str
     study_id: str
     series_id: str
     metadata: Dict[str, any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class DicomSeries:
     series_instance_uid: str
     series_description: Optional[str] = None
     modality: str = ""
     series_number: Optional[int] = None
+    # Images usually share the series directory, so only basenames are
+    # stored (relative to base_dir); entries that diverge from base_dir
+    # keep their full path
+    base_dir: str = ""
     images: List[str] = field(default_factory=list)
+    # Side-index for O(1) membership checks during ingest; never serialized
+    images_set: Set[str] = field(default_factory=set, repr=False, compare=False)
+    # Lowercased description cached once for case-insensitive queries
+    series_description_lower: str = field(default='', repr=False, compare=False)
+
+    def __post_init__(self):
+        self.images_set = set(self.images)
+        self.series_description_lower = (self.series_description or '').lower()
+
+    def image_paths(self):
+        """Yield the full path of every image in the series"""
+        base_dir = self.base_dir
+        for name in self.images:
+            yield name if os.sep in name else os.path.join(base_dir, name)
 
-@dataclass
+@dataclass(slots=True)
 class DicomStudy:
     study_instance_uid: str
     study_date: Optional[datetime] = None
     study_description: Optional[str] = None
     series: Dict[str, DicomSeries] = field(default_factory=dict)
+    # Lowercased description cached once for case-insensitive queries
+    study_description_lower: str = field(default='', repr=False, compare=False)
 
-@dataclass
+    def __post_init__(self):
+        self.study_description_lower = (self.study_description or '').lower()
+
+@dataclass(slots=True)
 class DicomPatient:
     patient_id: str
     patient_name: Optional[str] = None
     studies: Dict[str, DicomStudy] = field(default_factory=dict)
 
 class DicomDataManager:
+    SCAN_CACHE_FILENAME = ".scan_cache.pkl"
+
     def __init__(self, base_directory: str):
         self.base_directory = base_directory
         self.patients: Dict[str, DicomPatient] = {}
+        # Reverse indexes maintained by _ingest_record so queries can do
+        # hash/bisect lookups instead of walking the whole hierarchy
+        self.by_modality: Dict[str, List[DicomSeries]] = defaultdict(list)
+        self.by_series_number: Dict[int, List[DicomSeries]] = defaultdict(list)
+        self.by_patient_name: Dict[str, List[DicomPatient]] = defaultdict(list)
+        self.studies_sorted_by_date: List[DicomStudy] = []
+        self.all_series: List[DicomSeries] = []
         logger.info(f"Initialized DicomDataManager with base directory: {base_directory}")
     
     def process_dicom_file(self, file_path: str) -> bool:
         """Process a single DICOM file and add it to the hierarchy"""
-        try:
-            logger.debug(f"Processing file: {file_path}")
-            ds = pydicom.dcmread(file_path)
-            
-            # Extract required DICOM tags with fallbacks
-            patient_id = str(getattr(ds, 'PatientID', 'unknown'))
-            logger.debug(f"Found PatientID: {patient_id}")
-            
-            study_uid = str(getattr(ds, 'StudyInstanceUID', None) or 'study_1')
-            series_uid = str(getattr(ds, 'SeriesInstanceUID', None) or 'series_1')
-            
-            logger.debug(f"Study UID: {study_uid}, Series UID: {series_uid}")
-            
-            # Create or get patient
-            if patient_id not in self.patients:
-                logger.info(f"Creating new patient record for ID: {patient_id}")
-                self.patients[patient_id] = DicomPatient(
-                    patient_id=patient_id,
-                    patient_name=str(getattr(ds, 'PatientName', ''))
-                )
-            patient = self.patients[patient_id]
-            
-            # Create or get study
-            if study_uid not in patient.studies:
-                study_date = None
-                if hasattr(ds, 'StudyDate'):
-                    try:
-                        study_date = datetime.strptime(ds.StudyDate, '%Y%m%d')
-                    except ValueError:
-                        logger.warning(f"Invalid study date format in file: {file_path}")
-                
-                logger.info(f"Creating new study record for UID: {study_uid}")
-                patient.studies[study_uid] = DicomStudy(
-                    study_instance_uid=study_uid,
-                    study_date=study_date,
-                    study_description=str(getattr(ds, 'StudyDescription', ''))
-                )
-            study = patient.studies[study_uid]
-            
-            # Create or get series
-            if series_uid not in study.series:
-                # logger.info(f"Creating new series record for UID: {series_uid}")
-                study.series[series_uid] = DicomSeries(
-                    series_instance_uid=series_uid,
-                    series_description=str(getattr(ds, 'SeriesDescription', '')),
-                    modality=str(getattr(ds, 'Modality', '')),
-                    series_number=getattr(ds, 'SeriesNumber', None)
-                )
-            series = study.series[series_uid]
-            
-            # Add image file path if not already present
-            if file_path not in series.images:
-                logger.debug(f"Adding new image to series: {file_path}")
-                series.images.append(file_path)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error processing {file_path}: {e}", exc_info=True)
+        logger.debug("Processing file: %s", file_path)
+        record = _extract_tags(file_path)
+        if record is None:
             return False
-    
+        self._ingest_record(record)
+        return True
+
+    def _ingest_record(self, record: Tuple) -> 'DicomSeries':
+        """Merge one extracted-tag record into the patient hierarchy"""
+        (patient_id, patient_name, study_uid, study_date_str, study_desc,
+         series_uid, series_desc, modality, series_number, file_path) = record
+
+        # These values repeat across most files of a series/study (and the
+        # worker tuples arrive as fresh strings), so intern them: one shared
+        # copy in memory, and dict lookups/equality hit the pointer-compare
+        # fast path
+        patient_id = _intern(patient_id)
+        study_uid = _intern(study_uid)
+        series_uid = _intern(series_uid)
+        if patient_name:
+            patient_name = _intern(patient_name)
+        if modality:
+            modality = _intern(modality)
+
+        # Create or get patient (single dict probe per level; .get avoids
+        # the membership-test-then-index double lookup on this hot path)
+        patient = self.patients.get(patient_id)
+        if patient is None:
+            logger.info(f"Creating new patient record for ID: {patient_id}")
+            patient = DicomPatient(
+                patient_id=patient_id,
+                patient_name=patient_name
+            )
+            self.patients[patient_id] = patient
+            self.by_patient_name[patient_name].append(patient)
+
+        # Create or get study
+        study = patient.studies.get(study_uid)
+        if study is None:
+            study_date = _parse_dicom_date(study_date_str)
+            if study_date is None and study_date_str is not None:
+                logger.warning(f"Invalid study date format in file: {file_path}")
+
+            logger.info(f"Creating new study record for UID: {study_uid}")
+            study = DicomStudy(
+                study_instance_uid=study_uid,
+                study_date=study_date,
+                study_description=study_desc
+            )
+            patient.studies[study_uid] = study
+            if study_date is not None:
+                insort(self.studies_sorted_by_date, study, key=attrgetter('study_date'))
+
+        # Create or get series
+        series = study.series.get(series_uid)
+        if series is None:
+            # logger.info(f"Creating new series record for UID: {series_uid}")
+            series = DicomSeries(
+                series_instance_uid=series_uid,
+                series_description=series_desc,
+                modality=modality,
+                series_number=series_number
+            )
+            study.series[series_uid] = series
+            self.by_modality[modality].append(series)
+            if series_number is not None:
+                self.by_series_number[series_number].append(series)
+            self.all_series.append(series)
+
+        # Add image (prefix-stripped when it lives in the series base dir)
+        dir_, name = os.path.split(file_path)
+        if not series.images:
+            series.base_dir = dir_
+        stored = name if dir_ == series.base_dir else file_path
+        if stored not in series.images_set:
+            series.images.append(stored)
+            series.images_set.add(stored)
+
+        return series
+
     def scan_directory(self, directory: str) -> int:
-        """Scan directory for DICOM files and process them"""
-        processed_count = 0
-        
+        """Scan directory for DICOM files and process them in parallel"""
         logger.info(f"Starting directory scan: {directory}")
-        
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.startswith('I'):  # Modified to match your file naming
-                    file_path = os.path.join(root, file)
-                    logger.debug(f"Found potential DICOM file: {file_path}")
-                    if self.process_dicom_file(file_path):
-                        processed_count += 1
-        
+
+        # A DICOMDIR already enumerates the whole hierarchy, so consume it
+        # instead of opening every instance file
+        dicomdir_path = os.path.join(directory, "DICOMDIR")
+        if os.path.exists(dicomdir_path):
+            try:
+                processed_count = self._scan_dicomdir(dicomdir_path)
+                logger.info(f"Directory scan complete from DICOMDIR. Total processed: {processed_count}")
+                return processed_count
+            except Exception as e:
+                logger.warning(f"Failed to read DICOMDIR, falling back to file scan: {e}")
+
+        # Collect candidate paths first, then parse headers across processes;
+        # merging into the hierarchy stays on the main process.
+        debug = logger.isEnabledFor(logging.DEBUG)
+        file_paths = []
+        for file_path in _iter_dicom_paths(directory):
+            if debug:
+                logger.debug("Found potential DICOM file: %s", file_path)
+            file_paths.append(file_path)
+
+        # The on-disk cache only describes this directory, so it is only
+        # usable (and only rewritten) when this manager holds nothing else
+        fresh = not self.patients
+        fingerprint = self._scan_fingerprint(file_paths)
+        if fresh:
+            cached_count = self._load_scan_cache(directory, fingerprint)
+            if cached_count is not None:
+                logger.info(f"Directory scan served from cache. Total processed: {cached_count}")
+                return cached_count
+
+        processed_count = sum(1 for _ in self._iter_parse(file_paths))
+
+        if fresh:
+            self._write_scan_cache(directory, fingerprint, processed_count)
+
         logger.info(f"Directory scan complete. Total processed: {processed_count}")
-        return processed_count
\ No newline at end of file
+        return processed_count
+
+    def _scan_dicomdir(self, dicomdir_path: str) -> int:
+        """Populate the hierarchy from a DICOMDIR's directory records.
+
+        The record sequence is ordered depth-first, so the most recent
+        PATIENT/STUDY/SERIES records provide the context for each IMAGE
+        record; referenced file paths are resolved but never opened.
+        """
+        ds = pydicom.dcmread(dicomdir_path)
+        base = os.path.dirname(dicomdir_path)
+        processed_count = 0
+
+        patient_id, patient_name = 'unknown', ''
+        study_uid, study_date, study_desc = 'study_1', None, ''
+        series_uid, series_desc, modality, series_number = 'series_1', '', '', None
+
+        for record in ds.DirectoryRecordSequence:
+            record_type = record.DirectoryRecordType
+            if record_type == 'PATIENT':
+                patient_id = _get_str(record, 'PatientID', 'unknown')
+                patient_name = _get_str(record, 'PatientName')
+            elif record_type == 'STUDY':
+                study_uid = _get_str(record, 'StudyInstanceUID') or 'study_1'
+                study_date = record.get('StudyDate')
+                study_desc = _get_str(record, 'StudyDescription')
+            elif record_type == 'SERIES':
+                series_uid = _get_str(record, 'SeriesInstanceUID') or 'series_1'
+                series_desc = _get_str(record, 'SeriesDescription')
+                modality = _get_str(record, 'Modality')
+                number = record.get('SeriesNumber')
+                series_number = int(number) if number is not None else None
+            elif record_type == 'IMAGE':
+                ref = record.ReferencedFileID
+                parts = [ref] if isinstance(ref, str) else list(ref)
+                file_path = os.path.join(base, *parts)
+                self._ingest_record((
+                    patient_id, patient_name, study_uid, study_date, study_desc,
+                    series_uid, series_desc, modality, series_number, file_path
+                ))
+                processed_count += 1
+
+        return processed_count
+
+    def iter_scan(self, directory: str):
+        """Incrementally scan directory, yielding each file's series.
+
+        Files are ingested (and the indexes updated) as results stream
+        back from the parse pool. Abandoning the generator cancels the
+        not-yet-started parse work, so an early exit skips most of the
+        remaining files; chunks already in flight (up to workers * 64
+        files) still complete before the pool shuts down.
+        """
+        yield from self._iter_parse(list(_iter_dicom_paths(directory)))
+
+    def _iter_parse(self, file_paths: List[str]):
+        """Parse file_paths across the pool, ingesting and yielding per file"""
+        if not file_paths:
+            return
+        executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+        try:
+            for record in executor.map(_extract_tags, file_paths, chunksize=64):
+                if record is not None:
+                    yield self._ingest_record(record)
+        finally:
+            # Runs on generator close/break too: cancel the queued chunks
+            # instead of letting the pool grind through every file
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def to_dataframe(self):
+        """Export the hierarchy as a columnar DataFrame, one row per series.
+
+        Vectorized filtering over the columns is far faster than Python
+        loops for bulk analytics. pandas is imported lazily here so it
+        stays an optional dependency for callers that want this view.
+        """
+        import pandas as pd
+
+        rows = []
+        for patient in self.patients.values():
+            for study in patient.studies.values():
+                for series in study.series.values():
+                    rows.append((
+                        patient.patient_id,
+                        patient.patient_name,
+                        study.study_instance_uid,
+                        study.study_date,
+                        study.study_description,
+                        series.series_instance_uid,
+                        series.series_description,
+                        series.modality,
+                        series.series_number,
+                        len(series.images),
+                    ))
+        return pd.DataFrame(rows, columns=[
+            'patient_id', 'patient_name', 'study_uid', 'study_date',
+            'study_description', 'series_uid', 'series_description',
+            'modality', 'series_number', 'image_count',
+        ])
+
+    @staticmethod
+    def _scan_fingerprint(file_paths: List[str]) -> Tuple[int, int]:
+        """Cheap change detector: candidate count and newest mtime"""
+        max_mtime = 0
+        for path in file_paths:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            if mtime > max_mtime:
+                max_mtime = mtime
+        return (len(file_paths), max_mtime)
+
+    def _load_scan_cache(self, directory: str, fingerprint: Tuple[int, int]) -> Optional[int]:
+        """Restore a previous scan of directory if it is still current"""
+        cache_path = os.path.join(directory, self.SCAN_CACHE_FILENAME)
+        try:
+            with open(cache_path, 'rb') as f:
+                cache = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if cache.get('fingerprint') != fingerprint:
+            return None
+
+        self.patients = cache['patients']
+        self.by_modality = cache['by_modality']
+        self.by_series_number = cache['by_series_number']
+        self.by_patient_name = cache['by_patient_name']
+        self.studies_sorted_by_date = cache['studies_sorted_by_date']
+        self.all_series = cache['all_series']
+        return cache['count']
+
+    def _write_scan_cache(self, directory: str, fingerprint: Tuple[int, int], count: int):
+        """Atomically persist the scan result next to the scanned files"""
+        cache_path = os.path.join(directory, self.SCAN_CACHE_FILENAME)
+        cache = {
+            'fingerprint': fingerprint,
+            'count': count,
+            'patients': self.patients,
+            'by_modality': self.by_modality,
+            'by_series_number': self.by_series_number,
+            'by_patient_name': self.by_patient_name,
+            'studies_sorted_by_date': self.studies_sorted_by_date,
+            'all_series': self.all_series,
+        }
+        tmp_path = cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write scan cache: {e}")
\ No newline at end of file
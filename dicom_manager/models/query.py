@@ -1,5 +1,7 @@
 # dicom_manager/models/query.py
-from typing import List, Dict, Any, Optional
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+from typing import Iterator, List, Dict, Any, Optional
 import logging
 from datetime import datetime
 from dicom_manager.models.dicom_data import DicomDataManager, DicomPatient, DicomStudy, DicomSeries
@@ -10,40 +12,43 @@ class DicomQuery:
     def __init__(self, data_manager: DicomDataManager):
         self.data_manager = data_manager
     
-    def _date_matches(self, study_date: Optional[datetime], 
-                     date_from: Optional[datetime], 
-                     date_to: Optional[datetime]) -> bool:
-        """Helper to check if a date falls within a range"""
-        if study_date is None:
-            return False
-        if date_from and study_date < date_from:
-            return False
-        if date_to and study_date > date_to:
-            return False
-        return True
-    
-    def query_by_metadata(self, 
+    def query_by_metadata(self,
                         patient_id: Optional[str] = None,
-                        patient_name: Optional[str] = None) -> List[DicomPatient]:
-        """Query patients based on ID or name"""
+                        patient_name: Optional[str] = None,
+                        lazy: bool = False) -> List[DicomPatient]:
+        """Query patients based on ID or name.
+
+        With lazy=True and an unscanned data manager, the base directory
+        is scanned incrementally and the scan is abandoned once the
+        requested patient_id appears, cancelling the parse work that
+        has not started yet (in-flight chunks still finish).
+        """
         results = []
-        logger.debug(f"Querying patients with ID={patient_id}, name={patient_name}")
-        logger.debug(f"Total patients in database: {len(self.data_manager.patients)}")
-        
-        for patient in self.data_manager.patients.values():
-            logger.debug(f"Checking patient {patient.patient_id} ({patient.patient_name})")
-            
+        logger.debug("Querying patients with ID=%s, name=%s", patient_id, patient_name)
+
+        if lazy and patient_id and patient_id not in self.data_manager.patients:
+            for _ in self.data_manager.iter_scan(self.data_manager.base_directory):
+                if patient_id in self.data_manager.patients:
+                    break
+
+        # Patient ID is the primary key, so that case is a direct lookup;
+        # otherwise narrow the candidate set via the name index
+        if patient_id:
+            patient = self.data_manager.patients.get(patient_id)
+            candidates = [patient] if patient is not None else []
+        elif patient_name:
+            candidates = self.data_manager.by_patient_name.get(patient_name, [])
+        else:
+            candidates = self.data_manager.patients.values()
+
+        for patient in candidates:
             if patient_id and patient.patient_id != patient_id:
-                logger.debug(f"Patient ID mismatch: {patient.patient_id} != {patient_id}")
                 continue
             if patient_name and patient.patient_name != patient_name:
-                logger.debug(f"Patient name mismatch: {patient.patient_name} != {patient_name}")
                 continue
-                
-            logger.debug(f"Found matching patient: {patient.patient_id}")
             results.append(patient)
-            
-        logger.debug(f"Found {len(results)} matching patients")
+
+        logger.debug("Found %d matching patients", len(results))
         return results
     
     def query_by_study(self,
@@ -51,57 +56,80 @@ class DicomQuery:
                       study_date_to: Optional[datetime] = None,
                       description: Optional[str] = None) -> List[DicomStudy]:
         """Query studies based on date range and description"""
+        logger.debug("Querying studies with date_from=%s, date_to=%s, description=%s",
+                     study_date_from, study_date_to, description)
+
+        # The sorted index holds every dated study (undated studies never
+        # match a date query), so the date window is a bisect slice
+        studies = self.data_manager.studies_sorted_by_date
+
+        # No predicates: every dated study matches
+        if study_date_from is None and study_date_to is None and description is None:
+            return list(studies)
+
         results = []
-        logger.debug(f"Querying studies with date_from={study_date_from}, date_to={study_date_to}, description={description}")
-        
-        for patient in self.data_manager.patients.values():
-            logger.debug(f"Checking studies for patient {patient.patient_id}")
-            for study in patient.studies.values():
-                logger.debug(f"Checking study {study.study_instance_uid}")
-                
-                if not self._date_matches(study.study_date, study_date_from, study_date_to):
-                    logger.debug("Date mismatch")
-                    continue
-                    
-                if description and description.lower() not in (study.study_description or "").lower():
-                    logger.debug("Description mismatch")
-                    continue
-                    
-                logger.debug("Found matching study")
-                results.append(study)
-                
-        logger.debug(f"Found {len(results)} matching studies")
+        lo = bisect_left(studies, study_date_from, key=attrgetter('study_date')) if study_date_from else 0
+        hi = bisect_right(studies, study_date_to, key=attrgetter('study_date')) if study_date_to else len(studies)
+
+        desc_l = description.lower() if description else None
+        for study in studies[lo:hi]:
+            if desc_l is not None and desc_l not in study.study_description_lower:
+                continue
+            results.append(study)
+
+        logger.debug("Found %d matching studies", len(results))
         return results
     
+    def batch_query_by_study(self, descriptions: List[str]) -> Dict[str, List[DicomStudy]]:
+        """Match several description terms against all studies in one pass.
+
+        Each term is lowercased once and every study description is
+        visited a single time, instead of one full query_by_study scan
+        per term; a single term just delegates to query_by_study.
+        """
+        if len(descriptions) == 1:
+            return {descriptions[0]: self.query_by_study(description=descriptions[0])}
+
+        needles = [(description, description.lower()) for description in descriptions]
+        results: Dict[str, List[DicomStudy]] = {description: [] for description in descriptions}
+        for study in self.data_manager.studies_sorted_by_date:
+            haystack = study.study_description_lower
+            for description, desc_l in needles:
+                if desc_l in haystack:
+                    results[description].append(study)
+        return results
+
     def query_by_series(self,
                        modality: Optional[str] = None,
                        series_number: Optional[int] = None,
-                       description: Optional[str] = None) -> List[DicomSeries]:
-        """Query series based on modality, number, and description"""
-        results = []
-        logger.debug(f"Querying series with modality={modality}, number={series_number}, description={description}")
-        
-        for patient in self.data_manager.patients.values():
-            logger.debug(f"Checking series for patient {patient.patient_id}")
-            for study in patient.studies.values():
-                logger.debug(f"Checking study {study.study_instance_uid}")
-                for series in study.series.values():
-                    logger.debug(f"Checking series {series.series_instance_uid}")
-                    
-                    if modality and series.modality != modality:
-                        logger.debug(f"Modality mismatch: {series.modality} != {modality}")
-                        continue
-                    if series_number is not None and series.series_number != series_number:
-                        logger.debug(f"Series number mismatch: {series.series_number} != {series_number}")
-                        continue
-                    if description and description.lower() not in (series.series_description or "").lower():
-                        logger.debug("Description mismatch")
-                        continue
-                        
-                    logger.debug("Found matching series")
-                    results.append(series)
-                    
-        logger.debug(f"Found {len(results)} matching series")
-        return results
+                       description: Optional[str] = None) -> Iterator[DicomSeries]:
+        """Query series based on modality, number, and description.
+
+        Matches are yielded lazily so consumers like any(...) can stop at
+        the first hit; wrap in list() when a materialized result is needed.
+        """
+        logger.debug("Querying series with modality=%s, number=%s, description=%s",
+                     modality, series_number, description)
+
+        # No predicates: every series matches
+        if modality is None and series_number is None and description is None:
+            yield from self.data_manager.all_series
+            return
+
+        # Start from the most selective index available
+        if modality:
+            candidates = self.data_manager.by_modality.get(modality, [])
+        elif series_number is not None:
+            candidates = self.data_manager.by_series_number.get(series_number, [])
+        else:
+            candidates = self.data_manager.all_series
+
+        desc_l = description.lower() if description else None
+        for series in candidates:
+            if series_number is not None and series.series_number != series_number:
+                continue
+            if desc_l is not None and desc_l not in series.series_description_lower:
+                continue
+            yield series
 
 __all__ = ['DicomQuery']
\ No newline at end of file
@@ -0,0 +1,25 @@
+# tests/conftest.py
+import os
+
+import pytest
+
+from dicom_manager.models.dicom_data import DicomDataManager
+from dicom_manager.models.query import DicomQuery
+from config.logging import setup_logging
+
+setup_logging()
+
+DICOM_DIR = "./DICOM"
+
+@pytest.fixture(scope="session")
+def dicom_data_manager():
+    """Scanned data manager shared by every test in the session"""
+    if not os.path.isdir(DICOM_DIR):
+        pytest.skip("DICOM directory not found. Please set up test data first.")
+    data_manager = DicomDataManager(DICOM_DIR)
+    data_manager.scan_directory(DICOM_DIR)
+    return data_manager
+
+@pytest.fixture(scope="session")
+def dicom_query(dicom_data_manager):
+    return DicomQuery(dicom_data_manager)
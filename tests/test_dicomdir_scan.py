@@ -0,0 +1,50 @@
+# tests/test_dicomdir_scan.py
+import logging
+
+import pytest
+from pydicom.data import get_testdata_file
+from pydicom.fileset import FileSet
+
+from dicom_manager.models.dicom_data import DicomDataManager
+
+logger = logging.getLogger(__name__)
+
+@pytest.fixture
+def fileset_dir(tmp_path):
+    """A small DICOMDIR-managed tree built from pydicom's bundled data"""
+    fs = FileSet()
+    fs.add(get_testdata_file("CT_small.dcm"))
+    fs.add(get_testdata_file("MR_small.dcm"))
+    fs.write(tmp_path)
+    return str(tmp_path)
+
+def test_scan_dicomdir_matches_file_scan(fileset_dir):
+    """The DICOMDIR fast path must build the same hierarchy as reading files"""
+    from_dicomdir = DicomDataManager(fileset_dir)
+    dicomdir_count = from_dicomdir.scan_directory(fileset_dir)
+
+    from_files = DicomDataManager(fileset_dir)
+    file_count = sum(1 for _ in from_files.iter_scan(fileset_dir))
+
+    logger.info("DICOMDIR scan: %d files, file scan: %d files",
+                dicomdir_count, file_count)
+    assert dicomdir_count == file_count
+    assert set(from_dicomdir.patients) == set(from_files.patients)
+
+    for patient_id, patient in from_dicomdir.patients.items():
+        other_patient = from_files.patients[patient_id]
+        assert set(patient.studies) == set(other_patient.studies)
+        for study_uid, study in patient.studies.items():
+            other_study = other_patient.studies[study_uid]
+            assert set(study.series) == set(other_study.series)
+            for series_uid, series in study.series.items():
+                other_series = other_study.series[series_uid]
+                assert series.modality == other_series.modality
+                assert set(series.image_paths()) == set(other_series.image_paths())
+
+def test_file_scan_skips_dicomdir(fileset_dir):
+    """The DICOMDIR itself must never be ingested as a phantom instance"""
+    manager = DicomDataManager(fileset_dir)
+    for series in manager.iter_scan(fileset_dir):
+        assert not any(path.endswith("DICOMDIR") for path in series.image_paths())
+    assert "unknown" not in manager.patients